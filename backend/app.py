@@ -75,8 +75,10 @@ def upload_meme():
         UserModel.increment_meme_count(user_id)
         
         # Clean up temporary file
-        if os.path.exists(temp_filepath):
-            os.remove(temp_filepath)
+        try:
+            os.unlink(temp_filepath)
+        except FileNotFoundError:
+            pass
 
         return jsonify({
             'meme_id': meme_id,
@@ -141,8 +143,10 @@ def generate_3d(meme_id):
             })
             
             # Clean up temporary file
-            if os.path.exists(mesh_local_path):
-                os.remove(mesh_local_path)
+            try:
+                os.unlink(mesh_local_path)
+            except FileNotFoundError:
+                pass
         
         # Update database with completed status and outputs
         MemeModel.update_status(meme_id, 'completed')
@@ -166,8 +170,8 @@ def export_meme(meme_id):
         return jsonify({'error': 'Meme not ready'}), 400
 
     try:
-        # Get mesh URLs from outputs
-        subjects = SubjectModel.get_by_meme(meme_id)
+        # Get mesh URLs from outputs (skip fetching heavy segmentation data)
+        subjects = SubjectModel.get_by_meme(meme_id, projection={'mesh_url': 1, 'subject_index': 1})
         if not subjects:
             return jsonify({'error': 'No subjects found'}), 404
         
@@ -203,8 +207,10 @@ def export_meme(meme_id):
             )
             
             # Clean up temporary file
-            if os.path.exists(output_path):
-                os.remove(output_path)
+            try:
+                os.unlink(output_path)
+            except FileNotFoundError:
+                pass
             
             return jsonify({
                 'export_id': export_id,
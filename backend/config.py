@@ -54,6 +54,6 @@ class Config:
     DEPTH_MODEL_NAME = 'Intel/dpt-hybrid-midas'  # or LiheYoung/depth-anything-large-hf
     
     # Processing
-    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+    ALLOWED_EXTENSIONS = frozenset({'png', 'jpg', 'jpeg', 'gif'})
     OUTPUT_FORMATS = ['gif', 'mp4', 'glb']
     MAX_UPLOAD_SIZE_MB = int(os.environ.get('MAX_UPLOAD_SIZE_MB', 50))
@@ -122,10 +122,17 @@ class SubjectModel:
         return collection.find_one({'_id': doc_id})
     
     @staticmethod
-    def get_by_meme(meme_id):
-        """Get all subjects for a meme"""
+    def get_by_meme(meme_id, projection=None):
+        """Get all subjects for a meme
+
+        Args:
+            meme_id: Meme the subjects belong to
+            projection: Optional MongoDB projection dict; callers that only
+                need a few fields should pass one so the large
+                segmentation_data payload never crosses the wire
+        """
         collection = SubjectModel.get_collection()
-        return list(collection.find({'meme_id': meme_id}))
+        return list(collection.find({'meme_id': meme_id}, projection))
 
 
 class ExportModel:
@@ -1,43 +1,121 @@
 import trimesh
 import numpy as np
-from PIL import Image
+import cv2
 import imageio
-import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
+
+@lru_cache(maxsize=8)
+def _load_mesh(path, mtime):
+    """Load a mesh, cached per (path, mtime) so repeat exports skip re-parsing
+
+    The mtime key invalidates the cache automatically when the file on
+    disk changes. Callers must treat the returned mesh as read-only and
+    copy() before transforming it.
+    """
+    return trimesh.load(path)
+
+
+def _decode_png(png_bytes):
+    """Decode an in-memory PNG straight to an RGB(A) ndarray"""
+    # cv2.imdecode goes from bytes to ndarray in one C-level copy, skipping
+    # the PIL open + np.array double-copy
+    img = cv2.imdecode(np.frombuffer(png_bytes, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+    if img.ndim == 3:
+        if img.shape[2] == 4:
+            img = cv2.cvtColor(img, cv2.COLOR_BGRA2RGBA)
+        else:
+            img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    return img
+
+
+def _render_frame(mesh_path, matrix, resolution=(800, 600)):
+    """Render one rotated view of a mesh (runs inside a pool worker)"""
+    # mesh_path may be an http(s) URL (Cloudinary or the local-fallback
+    # server) — only local files can be stat'ed for the mtime cache key;
+    # remote meshes go through trimesh's own URL loading uncached
+    if os.path.isfile(mesh_path):
+        mesh = _load_mesh(mesh_path, os.path.getmtime(mesh_path))
+    else:
+        mesh = trimesh.load(mesh_path)
+
+    rotated_mesh = mesh.copy()
+    rotated_mesh.apply_transform(matrix)
+
+    scene = rotated_mesh.scene()
+    png = scene.save_image(resolution=list(resolution))
+    return _decode_png(png)
+
+
 class ExportService:
     def __init__(self, output_folder='outputs/'):
         self.output_folder = Path(output_folder)
         self.output_folder.mkdir(exist_ok=True)
-    
+
     def create_rotating_gif(self, mesh_path, output_name, frames=36):
         """Create 360° rotating GIF of 3D mesh"""
-        mesh = trimesh.load(mesh_path)
-        
+        # Precompute all Y-axis rotation matrices at once instead of calling
+        # trimesh's general-purpose routine per frame
+        rotation_matrices = self._rotation_matrices(frames)
+
+        frame_duration = 0.1
         images = []
-        for i in range(frames):
-            angle = (i / frames) * 2 * np.pi
-            
-            # Render mesh from rotating camera
-            rotation_matrix = trimesh.transformations.rotation_matrix(
-                angle, [0, 1, 0]
-            )
-            rotated_mesh = mesh.copy()
-            rotated_mesh.apply_transform(rotation_matrix)
-            
-            # Render to image
-            img = self._render_mesh(rotated_mesh)
-            images.append(img)
-        
+        durations = []
+        prev_signature = None
+
+        # Each frame is an independent render of the same mesh, so rasterize
+        # them in parallel. Processes (not threads) because GL contexts
+        # don't share across threads.
+        n_workers = min(frames, os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = [
+                executor.submit(_render_frame, mesh_path, rotation_matrices[i])
+                for i in range(frames)
+            ]
+
+            # Collect in submission order to preserve the rotation sequence
+            for future in futures:
+                img = future.result()
+
+                # Skip frames identical to the previous one (e.g. symmetric
+                # meshes) by extending the previous frame's delay instead of
+                # re-encoding a duplicate
+                signature = img.tobytes()
+                if signature == prev_signature:
+                    durations[-1] += frame_duration
+                    continue
+                prev_signature = signature
+
+                images.append(img)
+                durations.append(frame_duration)
+
         # Save as GIF
         output_path = self.output_folder / f"{output_name}.gif"
-        imageio.mimsave(output_path, images, duration=0.1)
-        
+        imageio.mimsave(output_path, images, duration=durations)
+
         return str(output_path)
-    
+
+    @staticmethod
+    def _rotation_matrices(frames):
+        """Build a (frames, 4, 4) stack of Y-axis rotation matrices"""
+        # float32 is plenty of precision for graphics transforms and halves
+        # the memory traffic of the stack
+        angles = np.arange(frames, dtype=np.float32) * np.float32(2 * np.pi / frames)
+        c, s = np.cos(angles), np.sin(angles)
+        matrices = np.zeros((frames, 4, 4), dtype=np.float32)
+        matrices[:, 0, 0] = c
+        matrices[:, 0, 2] = s
+        matrices[:, 1, 1] = 1
+        matrices[:, 2, 0] = -s
+        matrices[:, 2, 2] = c
+        matrices[:, 3, 3] = 1
+        return matrices
+
     def _render_mesh(self, mesh):
-        """Render mesh to PIL Image using pyrender or simple projection"""
-        # Simplified: Use trimesh's built-in rendering
+        """Render mesh to an RGB ndarray using trimesh's built-in rendering"""
         scene = mesh.scene()
         png = scene.save_image(resolution=[800, 600])
-        return Image.open(io.BytesIO(png))
+        return _decode_png(png)
@@ -8,27 +8,31 @@ import numpy as np
 class SAM3Service:
     def __init__(self):
         self.device = 'cpu'  # Force CPU mode since CUDA is not available
-        
-        # Patch torch.zeros to convert 'cuda' to 'cpu' before initializing SAM3
+
+        # The SAM3 builder allocates with an explicit device='cuda', which a
+        # default-device context cannot override, so intercept torch.zeros —
+        # but only for the duration of the builder call, restoring in
+        # finally so no wrapper overhead or leaked patch survives init
         original_zeros = torch.zeros
-        def patched_zeros(*args, **kwargs):
+
+        def cpu_zeros(*args, **kwargs):
             if kwargs.get('device') == 'cuda':
                 kwargs['device'] = 'cpu'
             return original_zeros(*args, **kwargs)
-        
-        torch.zeros = patched_zeros
-        
+
         try:
-            self.model = build_sam3_image_model()
+            torch.zeros = cpu_zeros
+            try:
+                self.model = build_sam3_image_model()
+            finally:
+                # Restore original torch.zeros
+                torch.zeros = original_zeros
             self.model.to(self.device)
             self.processor = None  # Skip processor initialization due to missing tokenizer
         except Exception as e:
             # If processor fails due to missing tokenizer, continue without it
             print(f"Warning: Could not initialize SAM3Processor: {e}")
             self.processor = None
-        finally:
-            # Restore original torch.zeros
-            torch.zeros = original_zeros
     
     def segment_subjects(self, image_path, prompt=None):
         """
@@ -60,15 +64,23 @@ class SAM3Service:
     
     def _get_bbox(self, mask):
         """Extract bounding box from mask"""
+        # Row/column reductions keep memory at O(h + w); argmax on each
+        # reduction and its reverse gives the first/last set index without
+        # materializing per-pixel coordinate arrays
         rows = np.any(mask, axis=1)
         cols = np.any(mask, axis=0)
-        rmin, rmax = np.where(rows)[0][[0, -1]]
-        cmin, cmax = np.where(cols)[0][[0, -1]]
+        if not rows.any():
+            # argmax on all-False reductions would yield a full-frame bbox;
+            # fail loudly instead so an empty mask surfaces as an error
+            raise ValueError("Cannot compute bounding box of an empty mask")
+        rmin, rmax = np.argmax(rows), len(rows) - 1 - np.argmax(rows[::-1])
+        cmin, cmax = np.argmax(cols), len(cols) - 1 - np.argmax(cols[::-1])
         return {'x': int(cmin), 'y': int(rmin), 'width': int(cmax - cmin), 'height': int(rmax - rmin)}
     
     def _extract_subject(self, image, mask):
         """Extract subject from image using mask"""
         img_array = np.array(image)
-        mask_3d = np.stack([mask] * 3, axis=-1)
-        masked = img_array * mask_3d
+        # Broadcast the mask across channels instead of stacking it into a
+        # 3x larger temporary
+        masked = np.where(mask[:, :, None], img_array, 0)
         return Image.fromarray(masked.astype('uint8'))
@@ -6,13 +6,27 @@ With local fallback when Cloudinary is not configured
 
 import cloudinary
 import cloudinary.uploader
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from config import Config
+import hashlib
 import os
-import shutil
-import uuid
+import secrets
+import threading
 from PIL import Image
 
+logger = logging.getLogger(__name__)
+
+# Concurrency for batch uploads (I/O-bound HTTPS round-trips)
+UPLOAD_CONCURRENCY = int(os.environ.get('CLOUDINARY_CONCURRENCY', 8))
+
+# Files above this size stream to Cloudinary in chunks instead of being
+# buffered as one multipart body
+LARGE_UPLOAD_THRESHOLD = 20 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = int(os.environ.get('CLOUDINARY_CHUNK_SIZE', 6_000_000))
+
 
 # Check if Cloudinary is configured
 CLOUDINARY_CONFIGURED = bool(
@@ -22,7 +36,132 @@ CLOUDINARY_CONFIGURED = bool(
 )
 
 if not CLOUDINARY_CONFIGURED:
-    print("[INFO] Cloudinary not configured - using local storage fallback")
+    logger.info("Cloudinary not configured - using local storage fallback")
+
+
+@lru_cache(maxsize=4096)
+def _build_cloudinary_url(public_id, transformations_key):
+    """Build (and memoize) a Cloudinary delivery URL
+
+    CloudinaryImage construction and URL signing repeat the same work for
+    every render of the same asset; the cache makes repeats a dict hit.
+    """
+    if transformations_key:
+        return cloudinary.CloudinaryImage(public_id).build_url(**dict(transformations_key))
+    return cloudinary.CloudinaryImage(public_id).build_url()
+
+
+# URL prefix for locally stored files, built once at import
+_LOCAL_URL_PREFIX = os.environ.get('LOCAL_URL_PREFIX', 'http://localhost:5000/static/uploads/')
+
+# Results of uploads already performed by this process, keyed by
+# (user_id, content digest) so identical re-uploads are served from cache.
+# Bounded: once full, the oldest entry is evicted (dicts iterate in
+# insertion order, so next(iter(...)) is the FIFO head)
+UPLOAD_CACHE_MAX = int(os.environ.get('UPLOAD_CACHE_MAX', 1024))
+_upload_cache = {}
+_upload_cache_lock = threading.Lock()
+
+
+def _cache_upload(cache_key, uploaded):
+    """Record an upload result, evicting the oldest entry when full
+
+    Entries pointing at the same public_id are dropped first: Cloudinary
+    uploads use overwrite=True, so re-uploading a filename with different
+    content replaces the remote asset and any older cached result for
+    that public_id now serves the wrong bytes.
+    """
+    public_id = uploaded.get('public_id')
+    with _upload_cache_lock:
+        stale = [key for key, value in _upload_cache.items()
+                 if key != cache_key and value.get('public_id') == public_id]
+        for key in stale:
+            del _upload_cache[key]
+        while len(_upload_cache) >= UPLOAD_CACHE_MAX:
+            _upload_cache.pop(next(iter(_upload_cache)))
+        _upload_cache[cache_key] = uploaded
+
+
+def _evict_uploads_for(public_id):
+    """Drop cached upload results that point at a deleted asset"""
+    with _upload_cache_lock:
+        stale = [key for key, value in _upload_cache.items()
+                 if value.get('public_id') == public_id]
+        for key in stale:
+            del _upload_cache[key]
+
+
+def _content_key(file_path):
+    """Fast content digest for upload deduplication"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Directories already created by this process — steady-state uploads then
+# skip the mkdir syscall entirely
+_created_dirs = set()
+_created_dirs_lock = threading.Lock()
+
+
+def _ensure_dir(path):
+    """os.makedirs(..., exist_ok=True), memoized per process"""
+    with _created_dirs_lock:
+        if path not in _created_dirs:
+            os.makedirs(path, exist_ok=True)
+            _created_dirs.add(path)
+
+
+def _fast_copy(src, dst):
+    """Copy a file with kernel-side copy syscalls where available
+
+    Tries copy_file_range (server-side copy on Linux), then sendfile, then
+    a 1MB buffered loop as the portable fallback. Metadata is deliberately
+    not copied: these are freshly generated uploads where the shutil.copy2
+    timestamp pass is wasted work.
+    """
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+        size = os.fstat(src_fd).st_size
+
+        for copier in (_copy_file_range, _sendfile):
+            try:
+                copier(src_fd, dst_fd, size)
+                return
+            except (AttributeError, OSError):
+                # Syscall missing on this platform or unsupported by the
+                # kernel/filesystem; reset and try the next strategy
+                fsrc.seek(0)
+                fdst.seek(0)
+                fdst.truncate()
+
+        buf = bytearray(1 << 20)
+        view = memoryview(buf)
+        while True:
+            n = fsrc.readinto(buf)
+            if not n:
+                break
+            fdst.write(view[:n])
+
+
+def _copy_file_range(src_fd, dst_fd, size):
+    offset = 0
+    while offset < size:
+        copied = os.copy_file_range(src_fd, dst_fd, size - offset, offset, offset)
+        if copied == 0:
+            break
+        offset += copied
+
+
+def _sendfile(src_fd, dst_fd, size):
+    offset = 0
+    while offset < size:
+        sent = os.sendfile(dst_fd, src_fd, offset, size - offset)
+        if sent == 0:
+            break
+        offset += sent
 
 
 class CloudinaryStorageService:
@@ -35,11 +174,14 @@ class CloudinaryStorageService:
     
     # Local storage paths (fallback)
     LOCAL_STORAGE_BASE = 'static/uploads'
-    
+    LOCAL_MEMES_DIR = os.path.join(LOCAL_STORAGE_BASE, 'memes')
+
     @staticmethod
     def _get_local_url(relative_path):
         """Generate local URL for a file"""
-        return f"http://localhost:5000/static/uploads/{relative_path}"
+        # Plain concatenation onto the precomputed prefix — cheaper than
+        # re-formatting the constant part on every call
+        return _LOCAL_URL_PREFIX + relative_path
     
     @staticmethod
     def upload_meme_image(file_path, user_id, filename=None):
@@ -56,58 +198,73 @@ class CloudinaryStorageService:
         """
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
-        
+
+        # Re-uploads of identical content (common for meme templates) hit
+        # the content-addressed cache and skip the network round-trip
+        cache_key = (user_id, _content_key(file_path))
+        with _upload_cache_lock:
+            cached = _upload_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         # Use local storage if Cloudinary is not configured
+        cacheable = True
         if not CLOUDINARY_CONFIGURED:
-            return CloudinaryStorageService._upload_local_image(file_path, user_id, filename)
-        
-        try:
-            public_id = f"{CloudinaryStorageService.MEME_FOLDER}/{user_id}/{filename or Path(file_path).stem}"
-            
-            result = cloudinary.uploader.upload(
-                file_path,
-                public_id=public_id,
-                folder=CloudinaryStorageService.MEME_FOLDER,
-                resource_type='image',
-                overwrite=True,
-                tags=['meme', user_id]
-            )
-            
-            return {
-                'url': result['secure_url'],
-                'public_id': result['public_id'],
-                'format': result.get('format'),
-                'width': result.get('width'),
-                'height': result.get('height')
-            }
-        except Exception as e:
-            print(f"Error uploading to Cloudinary, falling back to local: {e}")
-            return CloudinaryStorageService._upload_local_image(file_path, user_id, filename)
+            uploaded = CloudinaryStorageService._upload_local_image(file_path, user_id, filename)
+        else:
+            try:
+                public_id = f"{CloudinaryStorageService.MEME_FOLDER}/{user_id}/{filename or Path(file_path).stem}"
+
+                result = cloudinary.uploader.upload(
+                    file_path,
+                    public_id=public_id,
+                    folder=CloudinaryStorageService.MEME_FOLDER,
+                    resource_type='image',
+                    overwrite=True,
+                    tags=['meme', user_id]
+                )
+
+                uploaded = {
+                    'url': result['secure_url'],
+                    'public_id': result['public_id'],
+                    'format': result.get('format'),
+                    'width': result.get('width'),
+                    'height': result.get('height')
+                }
+            except Exception:
+                logger.exception("Error uploading to Cloudinary, falling back to local")
+                uploaded = CloudinaryStorageService._upload_local_image(file_path, user_id, filename)
+                # A transient Cloudinary failure must not pin the local
+                # fallback result for the rest of the process lifetime
+                cacheable = False
+
+        if cacheable:
+            _cache_upload(cache_key, uploaded)
+        return uploaded
     
     @staticmethod
-    def _upload_local_image(file_path, user_id, filename=None):
+    def _upload_local_image(file_path, user_id, filename=None, dimensions=None):
         """Upload image to local storage (fallback)"""
         # Create local storage directory
-        user_folder = os.path.join(CloudinaryStorageService.LOCAL_STORAGE_BASE, 'memes', user_id)
-        os.makedirs(user_folder, exist_ok=True)
-        
+        user_folder = os.path.join(CloudinaryStorageService.LOCAL_MEMES_DIR, user_id)
+        _ensure_dir(user_folder)
+
         # Generate unique filename
         original_name = filename or Path(file_path).name
-        unique_id = str(uuid.uuid4())[:8]
+        unique_id = secrets.token_hex(4)
         dest_filename = f"{unique_id}_{original_name}"
         dest_path = os.path.join(user_folder, dest_filename)
-        
+
+        # Read dimensions from the source header (no pixel decode, no second
+        # open of the copied file) unless the caller already knows them
+        if dimensions is None:
+            with Image.open(file_path) as img:
+                dimensions = img.size
+        width, height = dimensions
+
         # Copy file to local storage
-        shutil.copy2(file_path, dest_path)
-        
-        # Get image dimensions
-        width, height = None, None
-        try:
-            with Image.open(dest_path) as img:
-                width, height = img.size
-        except:
-            pass
-        
+        _fast_copy(file_path, dest_path)
+
         relative_path = f"memes/{user_id}/{dest_filename}"
         
         return {
@@ -118,6 +275,43 @@ class CloudinaryStorageService:
             'height': height
         }
     
+    @staticmethod
+    def _upload_to_cloudinary(file_path, **options):
+        """Upload a file, streaming in chunks when it is large
+
+        upload_large keeps peak memory at O(chunk_size) instead of
+        O(file_size) and retries re-send only the failed chunk.
+        """
+        if os.path.getsize(file_path) > LARGE_UPLOAD_THRESHOLD:
+            return cloudinary.uploader.upload_large(
+                file_path, chunk_size=UPLOAD_CHUNK_SIZE, **options
+            )
+        return cloudinary.uploader.upload(file_path, **options)
+
+    @staticmethod
+    def upload_many(uploads):
+        """
+        Run several upload calls concurrently
+
+        Each upload blocks on a network round-trip, so fanning them out to a
+        thread pool cuts wall-clock time roughly linearly with concurrency
+        until the outbound link saturates.
+
+        Args:
+            uploads: list of (upload_method, args) tuples, e.g.
+                [(CloudinaryStorageService.upload_mesh, (path, meme_id, 0))]
+
+        Returns:
+            list of result dicts in the same order as the input
+        """
+        if not uploads:
+            return []
+
+        max_workers = min(len(uploads), UPLOAD_CONCURRENCY)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(fn, *args) for fn, args in uploads]
+            return [future.result() for future in futures]
+
     @staticmethod
     def upload_mesh(file_path, meme_id, subject_id):
         """
@@ -144,7 +338,7 @@ class CloudinaryStorageService:
             file_ext = Path(file_path).suffix
             public_id = f"{CloudinaryStorageService.MESH_FOLDER}/{meme_id}/subject_{subject_id}"
             
-            result = cloudinary.uploader.upload(
+            result = CloudinaryStorageService._upload_to_cloudinary(
                 file_path,
                 public_id=public_id,
                 resource_type='raw',
@@ -157,8 +351,8 @@ class CloudinaryStorageService:
                 'public_id': result['public_id'],
                 'bytes': result.get('bytes')
             }
-        except Exception as e:
-            print(f"Error uploading mesh to Cloudinary, falling back to local: {e}")
+        except Exception:
+            logger.exception("Error uploading mesh to Cloudinary, falling back to local")
             return CloudinaryStorageService._upload_local_file(
                 file_path, 'meshes', f"{meme_id}/subject_{subject_id}"
             )
@@ -167,17 +361,14 @@ class CloudinaryStorageService:
     def _upload_local_file(file_path, folder, name):
         """Upload any file to local storage (fallback)"""
         dest_folder = os.path.join(CloudinaryStorageService.LOCAL_STORAGE_BASE, folder)
-        os.makedirs(dest_folder, exist_ok=True)
-        
+        _ensure_dir(dest_folder)
+
         file_ext = Path(file_path).suffix
         dest_filename = f"{name.replace('/', '_')}{file_ext}"
         dest_path = os.path.join(dest_folder, dest_filename)
-        
-        # Ensure parent directory exists
-        os.makedirs(os.path.dirname(dest_path), exist_ok=True) if os.path.dirname(dest_path) else None
-        
-        shutil.copy2(file_path, dest_path)
-        
+
+        _fast_copy(file_path, dest_path)
+
         relative_path = f"{folder}/{dest_filename}"
         file_size = os.path.getsize(dest_path)
         
@@ -208,7 +399,7 @@ class CloudinaryStorageService:
         try:
             public_id = f"{CloudinaryStorageService.GIF_FOLDER}/{meme_id}"
             
-            result = cloudinary.uploader.upload(
+            result = CloudinaryStorageService._upload_to_cloudinary(
                 file_path,
                 public_id=public_id,
                 resource_type='image',
@@ -223,8 +414,8 @@ class CloudinaryStorageService:
                 'duration': result.get('duration'),
                 'frames': result.get('frames')
             }
-        except Exception as e:
-            print(f"Error uploading GIF to Cloudinary, falling back to local: {e}")
+        except Exception:
+            logger.exception("Error uploading GIF to Cloudinary, falling back to local")
             return CloudinaryStorageService._upload_local_file(file_path, 'gifs', meme_id)
     
     @staticmethod
@@ -248,7 +439,7 @@ class CloudinaryStorageService:
         try:
             public_id = f"{CloudinaryStorageService.OUTPUT_FOLDER}/{meme_id}/video"
             
-            result = cloudinary.uploader.upload(
+            result = CloudinaryStorageService._upload_to_cloudinary(
                 file_path,
                 public_id=public_id,
                 resource_type='video',
@@ -263,8 +454,8 @@ class CloudinaryStorageService:
                 'width': result.get('width'),
                 'height': result.get('height')
             }
-        except Exception as e:
-            print(f"Error uploading video to Cloudinary, falling back to local: {e}")
+        except Exception:
+            logger.exception("Error uploading video to Cloudinary, falling back to local")
             return CloudinaryStorageService._upload_local_file(file_path, 'videos', meme_id)
     
     @staticmethod
@@ -285,10 +476,13 @@ class CloudinaryStorageService:
                 CloudinaryStorageService.LOCAL_STORAGE_BASE,
                 public_id.replace('local/', '')
             )
-            if os.path.exists(local_path):
-                os.remove(local_path)
+            # Single unlink syscall; no exists() pre-check (TOCTOU race)
+            try:
+                os.unlink(local_path)
+                _evict_uploads_for(public_id)
                 return {'result': 'ok'}
-            return {'result': 'not found'}
+            except FileNotFoundError:
+                return {'result': 'not found'}
         
         if not CLOUDINARY_CONFIGURED:
             return {'result': 'cloudinary not configured'}
@@ -298,9 +492,13 @@ class CloudinaryStorageService:
                 public_id,
                 resource_type=resource_type
             )
+            # Cached delivery URLs and upload results for this asset are
+            # now stale
+            _build_cloudinary_url.cache_clear()
+            _evict_uploads_for(public_id)
             return result
-        except Exception as e:
-            print(f"Error deleting file: {e}")
+        except Exception:
+            logger.exception("Error deleting file")
             raise
     
     @staticmethod
@@ -322,9 +520,15 @@ class CloudinaryStorageService:
         if not CLOUDINARY_CONFIGURED:
             return None
         
-        if transformations:
+        # Canonicalize the transformation dict so the built URL can be
+        # cached; gallery pages re-request the same handful of URLs
+        transformations_key = tuple(sorted(transformations.items())) if transformations else ()
+        try:
+            return _build_cloudinary_url(public_id, transformations_key)
+        except TypeError:
+            # Chained transformations carry list/dict values that cannot be
+            # hashed into a cache key — build the URL uncached
             return cloudinary.CloudinaryImage(public_id).build_url(**transformations)
-        return cloudinary.CloudinaryImage(public_id).build_url()
     
     @staticmethod
     def list_user_files(user_id):
@@ -339,18 +543,22 @@ class CloudinaryStorageService:
         """
         if not CLOUDINARY_CONFIGURED:
             # List local files for user
-            user_folder = os.path.join(CloudinaryStorageService.LOCAL_STORAGE_BASE, 'memes', user_id)
+            user_folder = os.path.join(CloudinaryStorageService.LOCAL_MEMES_DIR, user_id)
             if not os.path.exists(user_folder):
                 return []
             
+            # scandir caches stat results from the directory read, so no
+            # extra stat syscall per file
             files = []
-            for filename in os.listdir(user_folder):
-                file_path = os.path.join(user_folder, filename)
-                files.append({
-                    'public_id': f"local/memes/{user_id}/{filename}",
-                    'url': CloudinaryStorageService._get_local_url(f"memes/{user_id}/{filename}"),
-                    'bytes': os.path.getsize(file_path)
-                })
+            with os.scandir(user_folder) as entries:
+                for entry in entries:
+                    if not entry.is_file():
+                        continue
+                    files.append({
+                        'public_id': f"local/memes/{user_id}/{entry.name}",
+                        'url': CloudinaryStorageService._get_local_url(f"memes/{user_id}/{entry.name}"),
+                        'bytes': entry.stat().st_size
+                    })
             return files
         
         try:
@@ -360,6 +568,6 @@ class CloudinaryStorageService:
                 max_results=100
             )
             return resources.get('resources', [])
-        except Exception as e:
-            print(f"Error listing user files: {e}")
+        except Exception:
+            logger.exception("Error listing user files")
             return []